@@ -2,6 +2,19 @@ from abc import ABC, abstractmethod
 
 
 class BaseMigration(ABC):
+    """
+    Base class for migrations.
+
+    Attributes:
+        dependencies (list[int] | None): Orders of the migrations that must be applied before this one.
+            `None` means the migration depends on the previous one. Migrations without a dependency
+            path between them may be applied concurrently.
+    """
+
+    __slots__ = ()
+
+    dependencies = None
+
     @abstractmethod
     async def migrate(self, db):
         pass
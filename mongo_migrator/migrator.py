@@ -1,16 +1,228 @@
 import argparse
+import ast
 import asyncio
+import importlib
 import importlib.util
 import logging
+import logging.handlers
 import os
+import pkgutil
+import re
+import sys
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, WriteConcern
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = 10
+PRELOADED_MIGRATIONS = 4
+STATE_ID = "_state"
+MIGRATION_MODULE_RE = re.compile(r"^(\d+)_[^.]+$")
+
+_CLIENTS = {}
+_MODULE_CACHE = {}
+_MIGRATION_CLASS_CACHE = {}
+_PACKAGE_MODULE_NAMES = {}
+
+
+def _module_dir(module_name, migrations_dir):
+    """
+    Resolves the migrations directory of a module relative to the current working directory.
+
+    Args:
+        module_name (str | None): The dotted name of the module containing the migrations directory.
+        migrations_dir (str): The name of the migrations directory.
+
+    Returns:
+        str: The absolute path to the migrations directory.
+    """
+    if module_name:
+        return os.path.join(os.getcwd(), module_name.replace('.', os.sep), migrations_dir)
+    return os.path.join(os.getcwd(), migrations_dir)
+
+
+def _load_migration(migration_path, migration_module_name):
+    """
+    Loads a migration module, executing it only once per process.
+
+    Args:
+        migration_path (str): The path to the migration file.
+        migration_module_name (str): The name of the migration module.
+
+    Returns:
+        module: The executed migration module.
+    """
+    migration_path = os.path.abspath(migration_path)
+    migration_module = _MODULE_CACHE.get(migration_path)
+    if migration_module is None and migration_path in _PACKAGE_MODULE_NAMES:
+        migration_module = importlib.import_module(_PACKAGE_MODULE_NAMES[migration_path])
+        _MODULE_CACHE[migration_path] = migration_module
+    elif migration_module is None:
+        spec = importlib.util.spec_from_file_location(migration_module_name, migration_path)
+        migration_module = importlib.util.module_from_spec(spec)
+        sys.modules[migration_module_name] = migration_module
+        try:
+            spec.loader.exec_module(migration_module)
+        except BaseException:
+            sys.modules.pop(migration_module_name, None)
+            raise
+        _MODULE_CACHE[migration_path] = migration_module
+    return migration_module
+
+
+def _load_migration_class(migration_path, migration_module_name):
+    """
+    Returns the `Migration` class of a migration module, caching the lookup.
+
+    Args:
+        migration_path (str): The path to the migration file.
+        migration_module_name (str): The name of the migration module.
+
+    Returns:
+        type: The migration class.
+    """
+    migration_path = os.path.abspath(migration_path)
+    migration_class = _MIGRATION_CLASS_CACHE.get(migration_path)
+    if migration_class is None:
+        migration_module = _load_migration(migration_path, migration_module_name)
+        migration_class = getattr(migration_module, "Migration")
+        _MIGRATION_CLASS_CACHE[migration_path] = migration_class
+    return migration_class
+
+
+def _find_migration_package_modules(package_name):
+    """
+    Finds the migration modules of a migrations package without importing them.
+
+    The modules are later imported as regular modules of the package, which reuses the compiled
+    files from `__pycache__`.
+
+    Args:
+        package_name (str): The dotted name of the migrations package.
+
+    Returns:
+        list: `(migration_order, migration_module_name, migration_path)` tuples of the migrations
+            of the package.
+    """
+    package = importlib.import_module(package_name)
+    migrations = []
+    for module_info in pkgutil.iter_modules(package.__path__):
+        match = MIGRATION_MODULE_RE.match(module_info.name)
+        if module_info.ispkg or not match:
+            continue
+        full_name = f"{package.__name__}.{module_info.name}"
+        migration_path = os.path.abspath(importlib.util.find_spec(full_name).origin)
+        _PACKAGE_MODULE_NAMES[migration_path] = full_name
+        migrations.append((int(match.group(1)), module_info.name, migration_path))
+    return migrations
+
+
+def _iter_migration_files(migrations_path):
+    """
+    Yields the migration files of a migrations directory as they are found.
+
+    Args:
+        migrations_path (str): The path to the migrations directory.
+
+    Yields:
+        tuple: `(migration_order, migration_module_name, migration_path)` of a migration file.
+    """
+    with os.scandir(migrations_path) as entries:
+        for entry in entries:
+            migration_module_name, extension = os.path.splitext(entry.name)
+            match = MIGRATION_MODULE_RE.match(migration_module_name)
+            if extension == ".py" and match and entry.is_file():
+                yield int(match.group(1)), migration_module_name, entry.path
+
+
+def _peek_migration_name(migration_path):
+    """
+    Reads the name of the migration class from the source without executing the module.
+
+    Args:
+        migration_path (str): The path to the migration file.
+
+    Returns:
+        str | None: The name of the class bound to `Migration`, or `None` if it can not be
+            determined statically.
+    """
+    try:
+        with open(migration_path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), migration_path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    migration_name = None
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "Migration":
+            migration_name = node.name
+        elif isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "Migration" for target in node.targets
+        ):
+            migration_name = node.value.id if isinstance(node.value, ast.Name) else None
+    return migration_name
+
+
+def _peek_migrations(migrations):
+    """
+    Reads the migration class names of migrations as they are discovered.
+
+    Args:
+        migrations (Iterable): `(migration_order, migration_module_name, migration_path)` tuples.
+
+    Returns:
+        list: `(migration, migration_name)` pairs sorted by migration order, see `_peek_migration_name`.
+    """
+    return sorted((migration, _peek_migration_name(migration[2])) for migration in migrations)
+
+
+def _check_unique_orders(migrations):
+    """
+    Checks that no two migrations share an order.
+
+    Args:
+        migrations (Iterable): `(migration_order, migration_module_name, migration_path)` tuples.
+
+    Raises:
+        Exception: If several migrations have the same order.
+    """
+    modules_by_order = {}
+    for migration_order, migration_module_name, _ in migrations:
+        modules_by_order.setdefault(migration_order, []).append(migration_module_name)
+    duplicates = {
+        migration_order: sorted(migration_module_names)
+        for migration_order, migration_module_names in modules_by_order.items()
+        if len(migration_module_names) > 1
+    }
+    if duplicates:
+        raise Exception(
+            "Several migrations have the same order: "
+            + "; ".join(
+                f"{migration_order}: {', '.join(migration_module_names)}"
+                for migration_order, migration_module_names in sorted(duplicates.items())
+            )
+        )
+
+
+def _migration_dependencies(migration_class, migration_order):
+    """
+    Returns the orders of the migrations a migration depends on.
+
+    Migrations that do not declare `dependencies` depend on the previous migration.
+
+    Args:
+        migration_class (type): The migration class.
+        migration_order (int): The order of the migration.
+
+    Returns:
+        set: The orders of the required migrations.
+    """
+    dependencies = getattr(migration_class, "dependencies", None)
+    if dependencies is None:
+        return {migration_order - 1} if migration_order > 1 else set()
+    return set(dependencies)
+
 
 class MigrationManager:
     """
@@ -21,13 +233,22 @@ class MigrationManager:
         db (AsyncIOMotorDatabase): MongoDB database.
         migrations_collection (AsyncIOMotorCollection): Collection for storing migration information.
 
+    The client keeps a small connection pool, which is enough for a one-shot migration run.
+    The applied migrations are stored in a single state document, written with `w=1, j=False`:
+    writes are not waited for to reach the journal, because losing one only makes a migration
+    run again. Migrations themselves use the database's write concern, so writes such as index
+    creation keep the durability configured in the connection URI (e.g. `w=majority`).
+
     Examples:
         - Run all migrations: `python migrate.py migrate backend`
         - Run one specific migration: `python migrate.py migrate-one backend 0001_migration`
         - Run one specific migration without module: `python migrate.py migrate-one 0001_migration`
         - Rollback a specific migration: `python migrate.py rollback backend.migrations.0001_migration`
+        - Rollback migrations 0003 to 0005: `python migrate.py rollback-range backend 3 5`
     """
 
+    __slots__ = ("client", "db", "migrations_collection", "_applied_names", "_applied_orders")
+
     def __init__(self, mongo_settings):
         """
         Initialize the migration manager.
@@ -35,39 +256,297 @@ class MigrationManager:
         Args:
             mongo_settings (MongoSettings): MongoDB settings object.
         """
-        self.client = AsyncIOMotorClient(mongo_settings.mongodb_uri)
+        self.client = self._get_client(mongo_settings.mongodb_uri)
         self.db = self.client[mongo_settings.mongo_database_name]
-        self.migrations_collection = self.db["migrations"]
+        self.migrations_collection = self.db.get_collection(
+            "migrations", write_concern=WriteConcern(w=1, j=False)
+        )
+        self._applied_names = None
+        self._applied_orders = None
 
-    async def apply_all_migrations(self, module_name, migrations_dir):
+    @staticmethod
+    def _get_client(mongodb_uri):
         """
-        Applies all migrations from the specified module and folder in the correct order.
+        Returns a client shared by all managers using the same URI on the same running event loop.
+
+        Managers created outside of a running loop get their own client, since a client is bound
+        to the loop that first uses it. Clients of closed loops are dropped from the cache.
+
+        Args:
+            mongodb_uri (str): MongoDB connection URI.
+
+        Returns:
+            AsyncIOMotorClient: Asynchronous MongoDB client.
+        """
+        client_options = {
+            "maxPoolSize": 16,
+            "minPoolSize": 4,
+            "retryWrites": True,
+            "serverSelectionTimeoutMS": 5000,
+        }
+        try:
+            io_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return AsyncIOMotorClient(mongodb_uri, **client_options)
+
+        for key in [key for key in _CLIENTS if key[1].is_closed()]:
+            _CLIENTS.pop(key).close()
+        client = _CLIENTS.get((mongodb_uri, io_loop))
+        if client is None:
+            client = AsyncIOMotorClient(mongodb_uri, io_loop=io_loop, **client_options)
+            _CLIENTS[(mongodb_uri, io_loop)] = client
+        return client
+
+    @staticmethod
+    def close_all():
+        """
+        Closes all shared clients.
+        """
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
+
+    async def _ensure_state(self):
+        """
+        Loads the names and orders of the applied migrations once per manager.
+
+        The applied migrations are tracked in a single state document of the migrations collection,
+        so they are read with one point lookup. If it does not exist yet, it is created from the
+        per-migration records written by earlier versions. The manager keeps the loaded state up
+        to date itself, so checking a migration does not query the database.
+        """
+        if self._applied_names is not None:
+            return
+        state = await self.migrations_collection.find_one({"_id": STATE_ID})
+        if state is None:
+            applied = {
+                doc["name"]: doc["order"]
+                async for doc in self.migrations_collection.find(
+                    {"_id": {"$ne": STATE_ID}}, {"name": 1, "order": 1}
+                )
+            }
+            state = await self.migrations_collection.find_one_and_update(
+                {"_id": STATE_ID},
+                {"$setOnInsert": {"names": list(applied), "orders": list(applied.values())}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        self._applied_names = set(state["names"])
+        self._applied_orders = set(state["orders"])
+
+    async def _record_applied(self, records):
+        """
+        Adds migrations to the state document.
+
+        Args:
+            records (list): `(migration_name, migration_order)` tuples of the applied migrations.
+        """
+        await self.migrations_collection.update_one(
+            {"_id": STATE_ID},
+            {
+                "$addToSet": {
+                    "names": {"$each": [migration_name for migration_name, _ in records]},
+                    "orders": {"$each": [migration_order for _, migration_order in records]},
+                }
+            },
+            upsert=True,
+            bypass_document_validation=True,
+        )
+
+    @staticmethod
+    async def _find_migrations(module_name, migrations_dir):
+        """
+        Finds the migrations of the specified module and folder.
 
         Args:
             module_name (str): The name of the module containing the migrations folder.
             migrations_dir (str): The name of the migrations folder.
+
+        Returns:
+            Iterable: `(migration_order, migration_module_name, migration_path)` tuples, unsorted.
+                Directory entries are only read while it is iterated.
+
+        Raises:
+            FileNotFoundError: If the migrations folder does not exist.
         """
-        if module_name:
-            migrations_path = os.path.join(os.getcwd(), module_name.replace('.', os.sep), migrations_dir)
-        else:
-            migrations_path = os.path.join(os.getcwd(), migrations_dir)
+        migrations_path = _module_dir(module_name, migrations_dir)
 
         if not os.path.exists(migrations_path):
             raise FileNotFoundError(f"Migrations directory not found at {migrations_path}")
 
-        migration_files = sorted(
-            [
-                f
-                for f in os.listdir(migrations_path)
-                if f.endswith(".py") and not f.startswith("__")
-            ],
-            key=lambda x: int(x.split("_")[0]),
+        if module_name and os.path.exists(os.path.join(migrations_path, "__init__.py")):
+            package_name = f"{module_name}.{migrations_dir}"
+            try:
+                return await asyncio.to_thread(_find_migration_package_modules, package_name)
+            except ModuleNotFoundError as e:
+                # The package is not importable from sys.path, load the files by path instead.
+                if e.name is None or not f"{package_name}.".startswith(f"{e.name}."):
+                    raise
+        return _iter_migration_files(migrations_path)
+
+    async def _record_rolled_back(self, records):
+        """
+        Removes migrations from the state document.
+
+        The per-migration records written by earlier versions are deleted too, so that the
+        migrations are not seen as applied if the state document is ever created from them again.
+
+        Args:
+            records (list): `(migration_name, migration_order)` tuples of the rolled back migrations.
+        """
+        migration_names = [migration_name for migration_name, _ in records]
+        migration_orders = [migration_order for _, migration_order in records]
+        await asyncio.gather(
+            self.migrations_collection.update_one(
+                {"_id": STATE_ID},
+                {"$pull": {"names": {"$in": migration_names}, "orders": {"$in": migration_orders}}},
+                bypass_document_validation=True,
+            ),
+            self.migrations_collection.delete_many(
+                {"_id": {"$ne": STATE_ID}, "name": {"$in": migration_names}}
+            ),
         )
+        if self._applied_names is not None:
+            self._applied_names.difference_update(migration_names)
+            self._applied_orders.difference_update(migration_orders)
 
-        for filename in migration_files:
-            migration_module_name = filename[:-3]
-            migration_path = os.path.join(migrations_path, filename)
-            await self.apply_migration(migration_module_name, migration_path)
+    async def apply_all_migrations(self, module_name, migrations_dir, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        Applies all migrations from the specified module and folder in the correct order.
+
+        Migration modules are loaded in order in a background task, a few ahead of the migrations
+        being applied. Every loaded migration whose dependencies are satisfied is applied right away,
+        concurrently with the other such migrations.
+
+        Args:
+            module_name (str): The name of the module containing the migrations folder.
+            migrations_dir (str): The name of the migrations folder.
+            max_concurrency (int): The maximum number of migrations applied at the same time.
+
+        Raises:
+            Exception: If the dependencies of the remaining migrations can not be satisfied.
+        """
+        async def discover():
+            migrations = await self._find_migrations(module_name, migrations_dir)
+            # Each source is parsed right after its directory entry is read, in a worker thread.
+            return await asyncio.to_thread(_peek_migrations, migrations)
+
+        # The directory is scanned while the applied migrations are fetched.
+        peeked_migrations, _ = await asyncio.gather(discover(), self._ensure_state())
+        _check_unique_orders(migration for migration, _ in peeked_migrations)
+        pending_records = []
+
+        # Already applied migrations are not executed at all.
+        migrations = [
+            migration
+            for migration, migration_name in peeked_migrations
+            if migration_name is None or migration_name not in self._applied_names
+        ]
+
+        try:
+            await self._apply_pipelined(migrations, max_concurrency, pending_records)
+        finally:
+            # Records of migrations applied before a failure are still flushed,
+            # so the next run resumes from the failed migration.
+            if pending_records:
+                try:
+                    await self._record_applied(pending_records)
+                except BaseException:
+                    # The in-memory state no longer matches the collection, reload it next time.
+                    self._applied_names = self._applied_orders = None
+                    raise
+
+    async def _apply_pipelined(self, migrations, max_concurrency, pending_records):
+        """
+        Applies migrations while the next ones are still being loaded.
+
+        A producer task loads the migration modules in worker threads and queues the prepared
+        migrations. The consumer starts every queued migration whose dependencies are applied and,
+        after a failure, stops starting new ones and waits for the running ones to finish.
+
+        Args:
+            migrations (list): `(migration_order, migration_module_name, migration_path)` tuples
+                of the migrations to apply, sorted by order.
+            max_concurrency (int): The maximum number of migrations applied at the same time.
+            pending_records (list): The list the records of the applied migrations are appended to.
+
+        Raises:
+            Exception: If the dependencies of the remaining migrations can not be satisfied.
+        """
+        queue = asyncio.Queue(maxsize=PRELOADED_MIGRATIONS)
+
+        async def produce():
+            for migration_order, migration_module_name, migration_path in migrations:
+                migration_class = await asyncio.to_thread(
+                    _load_migration_class, migration_path, migration_module_name
+                )
+                migration = migration_class()
+                await queue.put((
+                    migration_order,
+                    migration.migrate,
+                    type(migration).__name__,
+                    _migration_dependencies(migration_class, migration_order),
+                ))
+            await queue.put(None)
+
+        apply_prepared = self._apply_prepared
+        pending = {}
+        running = set()
+        failure = None
+        loading = True
+        producer = asyncio.ensure_future(produce())
+        next_migration = None
+        try:
+            while True:
+                if failure is None:
+                    for migration_order in sorted(pending):
+                        if len(running) >= max_concurrency:
+                            break
+                        migrate, migration_name, dependencies = pending[migration_order]
+                        if dependencies <= self._applied_orders:
+                            del pending[migration_order]
+                            running.add(asyncio.ensure_future(
+                                apply_prepared(migrate, migration_name, migration_order, pending_records)
+                            ))
+                    if loading and next_migration is None:
+                        next_migration = asyncio.ensure_future(queue.get())
+
+                waiting = set(running)
+                if failure is None and loading:
+                    waiting.add(next_migration)
+                    if not producer.done():
+                        waiting.add(producer)
+                if not waiting:
+                    break
+
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if next_migration in done:
+                    item = next_migration.result()
+                    next_migration = None
+                    if item is None:
+                        loading = False
+                    else:
+                        migration_order, *prepared_migration = item
+                        pending[migration_order] = prepared_migration
+                if producer in done and producer.exception() is not None and failure is None:
+                    failure = producer.exception()
+                for task in done & running:
+                    running.discard(task)
+                    if task.exception() is not None and failure is None:
+                        failure = task.exception()
+        finally:
+            producer.cancel()
+            if next_migration is not None:
+                next_migration.cancel()
+            for task in running:
+                task.cancel()
+
+        if failure is not None:
+            raise failure
+        if pending:
+            raise Exception(
+                f"Dependencies of migrations with orders {sorted(pending)} can not be satisfied."
+            )
 
     async def apply_migration(self, migration_module_name, migration_path):
         """
@@ -78,33 +557,49 @@ class MigrationManager:
             migration_path (str): The path to the migration file.
 
         Raises:
-            Exception: If the previous migration has not been applied.
+            Exception: If a migration it depends on has not been applied.
         """
-        spec = importlib.util.spec_from_file_location(migration_module_name, migration_path)
-        migration_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(migration_module)
-        migration_class = getattr(migration_module, "Migration")
+        migration_class = _load_migration_class(migration_path, migration_module_name)
         migration = migration_class()
         migration_name = migration.__class__.__name__
         migration_order = int(migration_module_name.split("_")[0])
 
-        if migration_order > 1:
-            previous_migration_order = migration_order - 1
-            previous_migration = await self.migrations_collection.find_one(
-                {"order": previous_migration_order}
-            )
-            if not previous_migration:
-                raise Exception(
-                    f"Previous migration with order {previous_migration_order} has not been applied."
-                )
+        await self._ensure_state()
 
-        if not await self.migrations_collection.find_one({"name": migration_name}):
-            logger.info(f"Applying migration {migration_name}...")
-            await migration.migrate(self.db)
-            await self.migrations_collection.insert_one(
-                {"name": migration_name, "order": migration_order, "applied": True}
+        missing_dependencies = (
+            _migration_dependencies(migration_class, migration_order) - self._applied_orders
+        )
+        if missing_dependencies:
+            raise Exception(
+                f"Migrations with orders {sorted(missing_dependencies)} required by migration "
+                f"{migration_order} have not been applied."
             )
-            logger.info(f"Migration {migration_name} applied successfully.")
+
+        await self._apply_prepared(migration.migrate, migration_name, migration_order)
+
+    async def _apply_prepared(self, migrate, migration_name, migration_order, pending_records=None):
+        """
+        Applies a migration whose dependencies are known to be satisfied, unless it is already applied.
+
+        Args:
+            migrate (Callable): The bound `migrate` method of the migration.
+            migration_name (str): The name of the migration.
+            migration_order (int): The order of the migration.
+            pending_records (list, optional): If given, the migration record is appended to it
+                instead of being written, and the caller is responsible for writing it.
+        """
+        if migration_name in self._applied_names:
+            return
+        logger.info(f"Applying migration {migration_name}...")
+        await migrate(self.db)
+        record = (migration_name, migration_order)
+        if pending_records is not None:
+            pending_records.append(record)
+        else:
+            await self._record_applied([record])
+        self._applied_names.add(migration_name)
+        self._applied_orders.add(migration_order)
+        logger.info(f"Migration {migration_name} applied successfully.")
 
     async def rollback_migration(self, migration_module_name, migration_path):
         """
@@ -114,17 +609,93 @@ class MigrationManager:
             migration_module_name (str): The name of the migration module.
             migration_path (str): The path to the migration file.
         """
-        spec = importlib.util.spec_from_file_location(migration_module_name, migration_path)
-        migration_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(migration_module)
-        migration_class = getattr(migration_module, "Migration")
+        migration_class = _load_migration_class(migration_path, migration_module_name)
         migration = migration_class()
         migration_name = migration.__class__.__name__
+        migration_order = int(migration_module_name.split("_")[0])
         logger.info(f"Rolling back migration {migration_name}...")
         await migration.rollback_migration(self.db)
-        await self.migrations_collection.delete_one({"name": migration_name})
+        await self._record_rolled_back([(migration_name, migration_order)])
         logger.info(f"Migration {migration_name} rolled back successfully.")
 
+    async def rollback_range(
+        self, module_name, migrations_dir, from_order, to_order, max_concurrency=DEFAULT_MAX_CONCURRENCY
+    ):
+        """
+        Rolls back the applied migrations with orders from `from_order` to `to_order` inclusive.
+
+        Migrations are rolled back in waves: a migration is rolled back after the migrations of
+        the range that depend on it, concurrently with the others of its wave.
+
+        Args:
+            module_name (str): The name of the module containing the migrations folder.
+            migrations_dir (str): The name of the migrations folder.
+            from_order (int): The order of the first migration to roll back.
+            to_order (int): The order of the last migration to roll back.
+            max_concurrency (int): The maximum number of migrations rolled back at the same time.
+
+        Raises:
+            Exception: If the migrations of the range depend on each other in a cycle.
+        """
+        migrations, _ = await asyncio.gather(
+            self._find_migrations(module_name, migrations_dir), self._ensure_state()
+        )
+        migrations = await asyncio.to_thread(list, migrations)
+        _check_unique_orders(migrations)
+        migrations = [migration for migration in migrations if from_order <= migration[0] <= to_order]
+        migration_classes = await asyncio.gather(
+            *(
+                asyncio.to_thread(_load_migration_class, migration_path, migration_module_name)
+                for _, migration_module_name, migration_path in migrations
+            )
+        )
+
+        pending = {}
+        for (migration_order, _, _), migration_class in zip(migrations, migration_classes):
+            migration = migration_class()
+            migration_name = type(migration).__name__
+            if migration_name in self._applied_names:
+                pending[migration_order] = (
+                    migration.rollback_migration,
+                    migration_name,
+                    _migration_dependencies(migration_class, migration_order),
+                )
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        rolled_back = []
+
+        async def run(rollback, migration_name, migration_order):
+            async with semaphore:
+                logger.info(f"Rolling back migration {migration_name}...")
+                await rollback(self.db)
+                rolled_back.append((migration_name, migration_order))
+                logger.info(f"Migration {migration_name} rolled back successfully.")
+
+        try:
+            while pending:
+                required = set().union(*(dependencies for _, _, dependencies in pending.values()))
+                ready = [migration_order for migration_order in pending if migration_order not in required]
+                if not ready:
+                    raise Exception(
+                        f"Migrations with orders {sorted(pending)} depend on each other in a cycle."
+                    )
+                wave = [(migration_order, pending.pop(migration_order)) for migration_order in ready]
+                # Let the whole wave settle before failing, so that its rolled back
+                # migrations are still removed from the state.
+                results = await asyncio.gather(
+                    *(
+                        run(rollback, migration_name, migration_order)
+                        for migration_order, (rollback, migration_name, _) in wave
+                    ),
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+        finally:
+            if rolled_back:
+                await self._record_rolled_back(rolled_back)
+
 
 def __import_settings():
     """
@@ -152,25 +723,22 @@ async def main(args):
     Args:
         args (argparse.Namespace): Command line arguments.
     """
+    # Allow migrations packages of the project to be imported like regular modules.
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
     settings = __import_settings()
     mongo_settings = settings.mongo_settings
     manager = MigrationManager(mongo_settings)
     if args.command == "migrate":
         await manager.apply_all_migrations(args.module, "migrations")
     elif args.command == "migrate-one":
-        if args.module:
-            migration_path = os.path.join(os.getcwd(), args.module.replace('.', os.sep), "migrations",
-                                          f"{args.migration}.py")
-        else:
-            migration_path = os.path.join(os.getcwd(), "migrations", f"{args.migration}.py")
+        migration_path = os.path.join(_module_dir(args.module, "migrations"), f"{args.migration}.py")
         await manager.apply_migration(args.migration, migration_path)
     elif args.command == "rollback":
-        if args.module:
-            migration_path = os.path.join(os.getcwd(), args.module.replace('.', os.sep), "migrations",
-                                          f"{args.migration}.py")
-        else:
-            migration_path = os.path.join(os.getcwd(), "migrations", f"{args.migration}.py")
+        migration_path = os.path.join(_module_dir(args.module, "migrations"), f"{args.migration}.py")
         await manager.rollback_migration(args.migration, migration_path)
+    elif args.command == "rollback-range":
+        await manager.rollback_range(args.module, "migrations", args.from_order, args.to_order)
 
 
 def entry_point():
@@ -200,8 +768,46 @@ def entry_point():
         "migration", type=str, help="The migration module to rollback."
     )
 
+    rollback_range_parser = subparsers.add_parser(
+        "rollback-range", help="Rollback the migrations of a range of orders."
+    )
+    rollback_range_parser.add_argument(
+        "module", nargs="?", type=str, help="The module containing the migrations directory."
+    )
+    rollback_range_parser.add_argument(
+        "from_order", type=int, help="The order of the first migration to rollback."
+    )
+    rollback_range_parser.add_argument(
+        "to_order", type=int, help="The order of the last migration to rollback."
+    )
+
     args = parser.parse_args()
-    asyncio.run(main(args))
+
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    if args.command in ("migrate", "rollback-range"):
+        # Batch commands write their log in one go when they finish, on errors or when the buffer is full.
+        log_handler = logging.handlers.MemoryHandler(
+            capacity=1024, flushLevel=logging.ERROR, target=log_handler
+        )
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(log_handler)
+
+    run_options = {}
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        if sys.version_info >= (3, 12):
+            run_options["loop_factory"] = uvloop.new_event_loop
+        else:
+            uvloop.install()
+    try:
+        asyncio.run(main(args), **run_options)
+    finally:
+        log_handler.flush()
 
 
 if __name__ == "__main__":
@@ -1,10 +1,42 @@
+import asyncio
+import os
+import sys
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, AsyncMock
+import migrator
 from migrator import MigrationManager
 
 
+def _scandir(filenames):
+    """
+    Возвращает замену os.scandir для каталога с указанными файлами.
+    """
+    entries = []
+    for filename in filenames:
+        entry = MagicMock()
+        entry.name = filename
+        entry.path = os.path.join('backend', 'migrations', filename)
+        entry.is_file.return_value = True
+        entries.append(entry)
+    scandir = MagicMock()
+    scandir.__enter__.return_value = iter(entries)
+    return scandir
+
+
 class TestMigrationManager(unittest.IsolatedAsyncioTestCase):
 
+    def setUp(self):
+        MigrationManager.close_all()
+        migrator._MODULE_CACHE.clear()
+        migrator._MIGRATION_CLASS_CACHE.clear()
+        migrator._PACKAGE_MODULE_NAMES.clear()
+
+    def _patch_apply_prepared(self, side_effect=None):
+        patcher = patch.object(MigrationManager, '_apply_prepared', new_callable=AsyncMock, side_effect=side_effect)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
     @patch('migrator.AsyncIOMotorClient')
     async def test_apply_all_migrations(self, mock_motor_client):
         """
@@ -12,7 +44,7 @@ class TestMigrationManager(unittest.IsolatedAsyncioTestCase):
 
         Use-case:
         - Пользователь хочет применить все миграции из указанного модуля и папки.
-        - Метод должен вызывать apply_migration для каждой миграции в правильном порядке.
+        - Метод должен применять каждую миграцию в правильном порядке.
         """
         # Arrange
         mock_settings = MagicMock()
@@ -20,16 +52,24 @@ class TestMigrationManager(unittest.IsolatedAsyncioTestCase):
         mock_settings.mongo_database_name = 'test_db'
         manager = MigrationManager(mock_settings)
         manager.migrations_collection = MagicMock()
-        manager.apply_migration = AsyncMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        self._patch_apply_prepared(
+            side_effect=lambda migrate, migration_name, migration_order, *args:
+            manager._applied_orders.add(migration_order)
+        )
 
-        with patch('os.listdir', return_value=['0001_migration.py', '0002_migration.py']):
+        with patch('os.scandir', return_value=_scandir(['__init__.py', '0003_.py', '0002_migration.py', '0001_migration.py'])), \
+                patch('migrator._load_migration_class', return_value=MagicMock(dependencies=None)):
             with patch('os.path.exists', return_value=True):
                 # Act
                 await manager.apply_all_migrations('backend', 'migrations')
 
                 # Assert
-                self.assertEqual(manager.apply_migration.await_count, 2)
-                manager.apply_migration.assert_awaited()
+                self.assertEqual(manager._apply_prepared.await_count, 2)
+                self.assertEqual([call.args[2] for call in manager._apply_prepared.await_args_list], [1, 2])
 
     @patch('migrator.AsyncIOMotorClient')
     async def test_apply_migration(self, mock_motor_client):
@@ -45,8 +85,10 @@ class TestMigrationManager(unittest.IsolatedAsyncioTestCase):
         mock_settings.mongo_database_name = 'test_db'
         manager = MigrationManager(mock_settings)
         manager.migrations_collection = MagicMock()
-        manager.migrations_collection.find_one = AsyncMock(return_value=None)
-        manager.migrations_collection.insert_one = AsyncMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
 
         mock_migration_module = MagicMock()
         mock_migration_class = MagicMock()
@@ -58,7 +100,7 @@ class TestMigrationManager(unittest.IsolatedAsyncioTestCase):
             await manager.apply_migration('0001_migration', 'path/to/0001_migration.py')
 
             mock_migration_class.return_value.migrate.assert_awaited_once()
-            manager.migrations_collection.insert_one.assert_awaited_once()
+            manager.migrations_collection.update_one.assert_awaited_once()
 
     @patch('migrator.AsyncIOMotorClient')
     async def test_rollback_migration(self, mock_motor_client):
@@ -75,7 +117,11 @@ class TestMigrationManager(unittest.IsolatedAsyncioTestCase):
         mock_settings.mongo_database_name = 'test_db'
         manager = MigrationManager(mock_settings)
         manager.migrations_collection = MagicMock()
-        manager.migrations_collection.delete_one = AsyncMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        manager.migrations_collection.delete_many = AsyncMock()
 
         mock_migration_module = MagicMock()
         mock_migration_class = MagicMock()
@@ -87,7 +133,460 @@ class TestMigrationManager(unittest.IsolatedAsyncioTestCase):
             await manager.rollback_migration('0001_migration', 'path/to/0001_migration.py')
 
             mock_migration_class.return_value.rollback_migration.assert_awaited_once()
-            manager.migrations_collection.delete_one.assert_awaited_once()
+            manager.migrations_collection.update_one.assert_awaited_once()
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_migration_module_loaded_once(self, mock_motor_client):
+        """
+        Тест для проверки кэширования модулей миграций.
+
+        Use-case:
+        - Пользователь применяет и затем откатывает одну и ту же миграцию в одном процессе.
+        - Модуль миграции должен быть выполнен только один раз.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        manager.migrations_collection.delete_many = AsyncMock()
+
+        mock_migration_module = MagicMock()
+        mock_migration_class = MagicMock()
+        mock_migration_class.return_value.migrate = AsyncMock()
+        mock_migration_class.return_value.rollback_migration = AsyncMock()
+        mock_migration_module.Migration = mock_migration_class
+
+        with patch('importlib.util.spec_from_file_location') as mock_spec, \
+                patch('importlib.util.module_from_spec', return_value=mock_migration_module):
+            # Act
+            await manager.apply_migration('0001_migration', 'path/to/0001_migration.py')
+            await manager.rollback_migration('0001_migration', 'path/to/0001_migration.py')
+
+            # Assert
+            mock_spec.assert_called_once()
+            mock_spec.return_value.loader.exec_module.assert_called_once()
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_apply_migration_with_known_state(self, mock_motor_client):
+        """
+        Тест для проверки метода apply_migration с уже загруженным состоянием.
+
+        Use-case:
+        - Менеджер уже загрузил множества примененных миграций, миграция 0003 зависит только от 0001.
+        - Метод не должен обращаться к коллекции миграций за проверками и должен обновить множества.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+
+        mock_migration_module = MagicMock()
+        mock_migration_class = MagicMock()
+        mock_migration_class.return_value.migrate = AsyncMock()
+        mock_migration_class.__name__ = 'ThirdMigration'
+        mock_migration_class.dependencies = [1]
+        mock_migration_class.return_value.__class__ = mock_migration_class
+        mock_migration_module.Migration = mock_migration_class
+        manager._applied_names = {'FirstMigration'}
+        manager._applied_orders = {1}
+
+        with patch('importlib.util.spec_from_file_location'), patch('importlib.util.module_from_spec',
+                                                                    return_value=mock_migration_module):
+            # Act
+            await manager.apply_migration('0003_migration', 'path/to/0003_migration.py')
+
+            # Assert
+            manager.migrations_collection.find.assert_not_called()
+            manager.migrations_collection.find_one.assert_not_awaited()
+            mock_migration_class.return_value.migrate.assert_awaited_once()
+            self.assertEqual(manager._applied_orders, {1, 3})
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_apply_all_migrations_flushes_records_on_failure(self, mock_motor_client):
+        """
+        Тест для проверки записи результатов apply_all_migrations при ошибке.
+
+        Use-case:
+        - Вторая миграция в пакете завершается с ошибкой.
+        - Успешно примененные миграции должны быть записаны в документ состояния одним обновлением.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+
+        async def apply_prepared(migrate, migration_name, migration_order, pending_records):
+            if migration_order == 2:
+                raise RuntimeError('migration failed')
+            pending_records.append(('FirstMigration', 1))
+            manager._applied_orders.add(1)
+
+        self._patch_apply_prepared(side_effect=apply_prepared)
+
+        with patch('os.scandir', return_value=_scandir(['0001_migration.py', '0002_migration.py'])), \
+                patch('migrator._load_migration_class', return_value=MagicMock(dependencies=None)):
+            with patch('os.path.exists', return_value=True):
+                # Act
+                with self.assertRaises(RuntimeError):
+                    await manager.apply_all_migrations('backend', 'migrations')
+
+                # Assert
+                manager.migrations_collection.update_one.assert_awaited_once_with(
+                    {'_id': '_state'},
+                    {'$addToSet': {'names': {'$each': ['FirstMigration']}, 'orders': {'$each': [1]}}},
+                    upsert=True,
+                    bypass_document_validation=True,
+                )
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_apply_all_migrations_runs_independent_migrations_together(self, mock_motor_client):
+        """
+        Тест для проверки параллельного применения независимых миграций.
+
+        Use-case:
+        - Миграции 0002 и 0003 зависят только от 0001.
+        - 0001 должна быть применена первой, а 0002 и 0003 должны выполняться одновременно.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        started = []
+        both_started = asyncio.Event()
+
+        async def apply_prepared(migrate, migration_name, migration_order, pending_records):
+            started.append(migration_order)
+            if migration_order != 1:
+                if len(started) == 3:
+                    both_started.set()
+                await asyncio.wait_for(both_started.wait(), timeout=1)
+            manager._applied_orders.add(migration_order)
+
+        self._patch_apply_prepared(side_effect=apply_prepared)
+        migration_classes = {
+            '0001_migration': MagicMock(dependencies=None),
+            '0002_migration': MagicMock(dependencies=[1]),
+            '0003_migration': MagicMock(dependencies=[1]),
+        }
+
+        with patch('os.scandir', return_value=_scandir(['0001_migration.py', '0002_migration.py', '0003_migration.py'])), \
+                patch('migrator._load_migration_class', side_effect=lambda path, name: migration_classes[name]):
+            with patch('os.path.exists', return_value=True):
+                # Act
+                await manager.apply_all_migrations('backend', 'migrations')
+
+                # Assert
+                self.assertEqual(started[0], 1)
+                self.assertEqual(sorted(started[1:]), [2, 3])
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_apply_all_migrations_imports_migrations_package(self, mock_motor_client):
+        """
+        Тест для проверки загрузки миграций из пакета.
+
+        Use-case:
+        - Папка миграций является пакетом (содержит __init__.py), доступным для импорта.
+        - Миграции должны импортироваться как обычные модули пакета и попадать в кэш модулей.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        self._patch_apply_prepared(
+            side_effect=lambda migrate, migration_name, migration_order, *args:
+            manager._applied_orders.add(migration_order)
+        )
+
+        with tempfile.TemporaryDirectory() as project_root:
+            migrations_path = os.path.join(project_root, 'pkgproject', 'migrations')
+            os.makedirs(migrations_path)
+            open(os.path.join(project_root, 'pkgproject', '__init__.py'), 'w').close()
+            open(os.path.join(migrations_path, '__init__.py'), 'w').close()
+            with open(os.path.join(migrations_path, '0001_first.py'), 'w') as f:
+                f.write('class Migration:\n    async def migrate(self, db):\n        pass\n')
+
+            cwd = os.getcwd()
+            os.chdir(project_root)
+            sys.path.insert(0, project_root)
+            try:
+                # Act
+                await manager.apply_all_migrations('pkgproject', 'migrations')
+            finally:
+                os.chdir(cwd)
+                sys.path.remove(project_root)
+                for name in [name for name in sys.modules if name.startswith('pkgproject')]:
+                    del sys.modules[name]
+
+            # Assert
+            manager._apply_prepared.assert_awaited_once()
+            self.assertEqual(
+                [module.__name__ for module in migrator._MODULE_CACHE.values()],
+                ['pkgproject.migrations.0001_first'],
+            )
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_state_created_from_migration_records(self, mock_motor_client):
+        """
+        Тест для проверки создания документа состояния.
+
+        Use-case:
+        - Коллекция миграций содержит только записи о миграциях из предыдущих версий.
+        - Документ состояния должен быть создан из этих записей.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(return_value=None)
+        manager.migrations_collection.find.return_value.__aiter__.return_value = [
+            {'name': 'AddIndexes', 'order': 1},
+        ]
+        manager.migrations_collection.find_one_and_update = AsyncMock(
+            return_value={'_id': '_state', 'names': ['AddIndexes'], 'orders': [1]}
+        )
+
+        # Act
+        await manager._ensure_state()
+
+        # Assert
+        update = manager.migrations_collection.find_one_and_update.await_args.args[1]
+        self.assertEqual(update, {'$setOnInsert': {'names': ['AddIndexes'], 'orders': [1]}})
+        self.assertEqual(manager._applied_names, {'AddIndexes'})
+        self.assertEqual(manager._applied_orders, {1})
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_managers_share_client(self, mock_motor_client):
+        """
+        Тест для проверки переиспользования клиента MongoDB.
+
+        Use-case:
+        - Пользователь создает несколько менеджеров миграций с одинаковыми настройками.
+        - Менеджеры должны использовать один и тот же клиент.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+
+        # Act
+        first_manager = MigrationManager(mock_settings)
+        second_manager = MigrationManager(mock_settings)
+        MigrationManager.close_all()
+
+        # Assert
+        mock_motor_client.assert_called_once()
+        self.assertIs(first_manager.client, second_manager.client)
+        first_manager.client.close.assert_called_once()
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_apply_all_migrations_skips_loading_applied_migrations(self, mock_motor_client):
+        """
+        Тест для проверки пропуска уже примененных миграций.
+
+        Use-case:
+        - Миграция AddIndexes уже применена, а миграция FillDefaults еще нет.
+        - Модуль примененной миграции не должен выполняться, применяется только новая миграция.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': ['AddIndexes'], 'orders': [1]}
+        )
+        self._patch_apply_prepared()
+
+        with tempfile.TemporaryDirectory() as migrations_path:
+            with open(os.path.join(migrations_path, '0001_add_indexes.py'), 'w') as f:
+                f.write('raise RuntimeError("must not be executed")\n'
+                        'class AddIndexes:\n    pass\n'
+                        'Migration = AddIndexes\n')
+            with open(os.path.join(migrations_path, '0002_fill_defaults.py'), 'w') as f:
+                f.write('class Migration:\n    async def migrate(self, db):\n        pass\n')
+
+            # Act
+            await manager.apply_all_migrations(None, migrations_path)
+
+            # Assert
+            manager._apply_prepared.assert_awaited_once()
+            self.assertEqual(manager._apply_prepared.await_args.args[2], 2)
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_apply_all_migrations_unsatisfiable_dependencies(self, mock_motor_client):
+        """
+        Тест для проверки миграций с невыполнимыми зависимостями.
+
+        Use-case:
+        - Миграция 0002 зависит от миграции 0005, которой не существует.
+        - Миграция 0001 должна быть применена, а метод должен сообщить о невыполнимых зависимостях.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        self._patch_apply_prepared(
+            side_effect=lambda migrate, migration_name, migration_order, *args:
+            manager._applied_orders.add(migration_order)
+        )
+        migration_classes = {
+            '0001_migration': MagicMock(dependencies=None),
+            '0002_migration': MagicMock(dependencies=[5]),
+        }
+
+        with patch('os.scandir', return_value=_scandir(['0001_migration.py', '0002_migration.py'])), \
+                patch('migrator._load_migration_class', side_effect=lambda path, name: migration_classes[name]):
+            with patch('os.path.exists', return_value=True):
+                # Act
+                with self.assertRaisesRegex(Exception, r'orders \[2\] can not be satisfied'):
+                    await manager.apply_all_migrations('backend', 'migrations')
+
+                # Assert
+                self.assertEqual([call.args[2] for call in manager._apply_prepared.await_args_list], [1])
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_rollback_range(self, mock_motor_client):
+        """
+        Тест для проверки метода rollback_range.
+
+        Use-case:
+        - Пользователь хочет откатить миграции с 0002 по 0003, миграция 0003 зависит от 0002.
+        - 0003 должна быть откачена раньше 0002, 0001 не затрагивается,
+          а записи удаляются из состояния одним обновлением.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': ['First', 'Second', 'Third'], 'orders': [1, 2, 3]}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        manager.migrations_collection.delete_many = AsyncMock()
+        rolled_back = []
+
+        def migration_class(name):
+            async def rollback_migration(self, db):
+                rolled_back.append(name)
+            return type(name, (), {'dependencies': None, 'rollback_migration': rollback_migration})
+
+        migration_classes = {
+            '0001_migration': migration_class('First'),
+            '0002_migration': migration_class('Second'),
+            '0003_migration': migration_class('Third'),
+        }
+
+        with patch('os.scandir', return_value=_scandir(['0001_migration.py', '0002_migration.py', '0003_migration.py'])), \
+                patch('migrator._load_migration_class', side_effect=lambda path, name: migration_classes[name]):
+            with patch('os.path.exists', return_value=True):
+                # Act
+                await manager.rollback_range('backend', 'migrations', 2, 3)
+
+                # Assert
+                self.assertEqual(rolled_back, ['Third', 'Second'])
+                manager.migrations_collection.update_one.assert_awaited_once_with(
+                    {'_id': '_state'},
+                    {'$pull': {'names': {'$in': ['Third', 'Second']}, 'orders': {'$in': [3, 2]}}},
+                    bypass_document_validation=True,
+                )
+                manager.migrations_collection.delete_many.assert_awaited_once_with(
+                    {'_id': {'$ne': '_state'}, 'name': {'$in': ['Third', 'Second']}}
+                )
+                self.assertEqual(manager._applied_orders, {1})
+
+    @patch('migrator.AsyncIOMotorClient')
+    async def test_apply_all_migrations_duplicate_orders(self, mock_motor_client):
+        """
+        Тест для проверки миграций с одинаковым порядковым номером.
+
+        Use-case:
+        - В папке есть две миграции с номером 0002.
+        - Метод должен сообщить об ошибке, не применяя ни одной миграции.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+        manager = MigrationManager(mock_settings)
+        manager.migrations_collection = MagicMock()
+        manager.migrations_collection.find_one = AsyncMock(
+            return_value={'_id': '_state', 'names': [], 'orders': []}
+        )
+        manager.migrations_collection.update_one = AsyncMock()
+        self._patch_apply_prepared()
+
+        with patch('os.scandir', return_value=_scandir(['0001_a.py', '0002_b.py', '0002_c.py'])), \
+                patch('migrator._load_migration_class', return_value=MagicMock(dependencies=None)):
+            with patch('os.path.exists', return_value=True):
+                # Act
+                with self.assertRaisesRegex(Exception, r'same order: 2: 0002_b, 0002_c'):
+                    await manager.apply_all_migrations('backend', 'migrations')
+
+                # Assert
+                manager._apply_prepared.assert_not_awaited()
+
+    @patch('migrator.AsyncIOMotorClient')
+    def test_client_not_shared_outside_event_loop(self, mock_motor_client):
+        """
+        Тест для проверки клиентов менеджеров, созданных вне event loop.
+
+        Use-case:
+        - Пользователь создает менеджеры до запуска asyncio.run.
+        - Каждый менеджер должен получить собственный клиент, который не кэшируется.
+        """
+        # Arrange
+        mock_settings = MagicMock()
+        mock_settings.mongodb_uri = 'mongodb://localhost:27017'
+        mock_settings.mongo_database_name = 'test_db'
+
+        # Act
+        MigrationManager(mock_settings)
+        MigrationManager(mock_settings)
+
+        # Assert
+        self.assertEqual(mock_motor_client.call_count, 2)
+        self.assertEqual(migrator._CLIENTS, {})
 
 
 if __name__ == '__main__':
@@ -16,6 +16,9 @@ setup(
     long_description_content_type='text/markdown',
     url='https://github.com/p1p1daster/mongo-migrator',
     install_requires=['motor>=3.5.0'],
+    extras_require={
+        'uvloop': ['uvloop; sys_platform != "win32"'],
+    },
     keywords='mongo migrator migrate',
     project_urls={
         'GitHub': 'https://github.com/p1p1daster/mongo-migrator'